@@ -1,11 +1,42 @@
-import random
-from typing import List, Optional, Iterable, Iterator
+import os
+from array import array
+from collections import Counter
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, List, Optional, Iterable, Iterator, Sequence, Tuple
 
 from .types import FilterConfig, SampleConfig
-from .io import iter_json, iter_jsonl, iter_sources
-from .extractors import extract
-from .filters import by_length, by_predicate
-from .samplers import RandomSampler, SequentialSampler, SpecifiedSampler
+from .io import (
+    is_remote, iter_json, iter_json_bytes, iter_jsonl, iter_jsonl_bytes, iter_sources, read_bytes,
+)
+from .extractors import get_extractor
+from .filters import by_length, by_predicate, in_range, lengths_of
+from .samplers import RandomSampler, SequentialSampler, SpecifiedSampler, permutation
+from .storage import TextArena, cache_key, cache_path as _cache_path, load_arena, save_arena
+
+
+def _extract_all(iters: Iterable[Any], is_sharegpt: bool) -> TextArena:
+    """调用extract函数抽取文本并过滤空值，结果打包为 TextArena（跨进程传输只需序列化一块字节缓冲）"""
+    extract_fn = get_extractor(is_sharegpt)  # 按格式选定特化抽取函数，热循环内只做一次局部调用
+    # 以生成器逐条写入 TextArena，不保留中间的文本列表
+    return TextArena.from_texts(t for t in map(extract_fn, iters) if t)
+
+
+def _load_file(args: Tuple[str, bool]) -> TextArena:
+    """
+    解析单个数据源文件并抽取文本（顶层函数，便于在子进程中执行）：
+    - JSONL文件逐行解析
+    - JSON文件按列表/字典解析
+    """
+    fp, is_sharegpt = args
+    iters = iter_jsonl(fp) if fp.endswith('.jsonl') else iter_json(fp)
+    return _extract_all(iters, is_sharegpt)
+
+
+def _load_bytes(fp: str, data: bytes, is_sharegpt: bool) -> TextArena:
+    """解析已读入内存的文件内容（远程数据源）"""
+    iters = iter_jsonl_bytes(data) if fp.endswith('.jsonl') else iter_json_bytes(data)
+    return _extract_all(iters, is_sharegpt)
 
 
 class TextDataset:
@@ -25,41 +56,94 @@ class TextDataset:
         tokenizer=None,
         cache: bool = True,
         seed: int = 0,
+        prefetch: int = 8,
     ):
         self.source = source  # 数据来源路径（单文件或目录）
         self.is_sharegpt = is_sharegpt  # 是否按ShareGPT格式解析文本
         self.tokenizer = tokenizer  # 可选Tokenizer，用于按token长度过滤
-        self.cache = cache  # 是否缓存解析结果（暂未实现，预留扩展）
+        self.cache = cache  # 是否缓存解析结果：本地数据源解析后写入 <source>.<plain|sharegpt>.cache，之后直接 mmap 载入
         self.seed = seed  # 随机种子，保证打乱与采样可复现
-        self._texts: List[str] = []  # 内部存储的已处理文本列表
+        self.prefetch = prefetch  # 远程数据源（s3://、gs:// 等）同时预取的文件数
+        self._texts: TextArena = TextArena.from_texts([])  # 内部存储的已处理文本（紧凑存储，按需解码）
+        self._word_lens: Optional[array] = None  # 词长缓存，与 _texts 一一对应，随 filter/shuffle 同步重排
 
     @property
-    def texts(self) -> List[str]:
-        """返回已处理的文本列表（只读）"""
+    def texts(self) -> Sequence[str]:
+        """返回已处理的文本序列（只读，支持 len()/下标/切片/迭代）"""
         return self._texts
 
-    def build_index(self, drop_empty: bool = True) -> None:
-        texts: List[str] = []
-        for fp in iter_sources(self.source):
-            iters = iter_jsonl(fp) if fp.endswith('.jsonl') else iter_json(fp)
-            """
-            遍历数据源文件：
-            - JSONL文件逐行解析
-            - JSON文件按列表/字典解析
-            调用extract函数抽取文本并过滤空值
-            """
-            for item in iters:
-                t = extract(item, self.is_sharegpt)
-                if t:
-                    texts.append(t)
-        if drop_empty:
-            texts = [t for t in texts if t and t.strip()]
+    def _word_lengths(self) -> array:
+        """返回与 _texts 对齐的词长数组，首次调用时计算并缓存，供 stats/filter 复用"""
+        if self._word_lens is None or len(self._word_lens) != len(self._texts):
+            self._word_lens = lengths_of(self._texts, 'words')
+        return self._word_lens
+
+    def _reorder(self, idxs: Sequence[int]) -> None:
+        """按下标列表重排（或截取）文本，同步重排词长缓存"""
+        self._texts = self._texts.take(idxs)
+        if self._word_lens is not None:
+            lens = self._word_lens
+            self._word_lens = array('l', [lens[i] for i in idxs])
+
+    def build_index(self, drop_empty: bool = True, num_workers: Optional[int] = 1) -> None:
+        """
+        解析数据源并构建文本索引
+        参数：
+        - drop_empty: 保留以兼容旧接口；extract 只返回非空文本，空白文本在抽取时即被丢弃
+        - num_workers: 并行解析文件的进程数，默认 1（在当前进程内顺序解析）；大于 1 或为 None（使用 CPU 核数）时
+          启用进程池，仅一个文件时不启用。spawn 启动方式（macOS/Windows 默认）下，调用脚本须置于
+          `if __name__ == '__main__':` 保护之内
+        """
+        args = [(fp, self.is_sharegpt) for fp in iter_sources(self.source)]
+        cache_path = key = None
+        texts = None
+        if self.cache and not is_remote(self.source):
+            cache_path = _cache_path(self.source, self.is_sharegpt)
+            key = cache_key([fp for fp, _ in args], self.is_sharegpt)
+            texts = load_arena(cache_path, key)
+        if texts is None:
+            texts = TextArena.concat(self._parse(args, num_workers))
+            if cache_path is not None and texts:
+                save_arena(texts, cache_path, key)
         if not texts:
             """若未提取到有效文本，抛出值错误"""
             raise ValueError('No valid texts found from source')
-        rnd = random.Random(self.seed)
-        rnd.shuffle(texts)
-        self._texts = texts
+        self._texts = texts.take(permutation(len(texts), self.seed))
+        self._word_lens = None
+
+    def _parse(self, args: List[Tuple[str, bool]], num_workers: Optional[int]) -> List[TextArena]:
+        """按数据源类型解析全部文件，返回各文件的文本存储（保持文件顺序）"""
+        if is_remote(self.source):
+            return self._load_remote([fp for fp, _ in args])
+        if len(args) <= 1 or num_workers == 1:  # 默认顺序解析，多进程需显式开启
+            return [_load_file(a) for a in args]
+        # 各文件的 JSON 解析与文本抽取相互独立且为 CPU 密集型，按文件分发到多进程；
+        # 文件数远多于进程数时增大 chunksize，减少进程间调度开销
+        workers = num_workers or os.cpu_count() or 1
+        chunksize = max(1, len(args) // (4 * workers))
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            return list(ex.map(_load_file, args, chunksize=chunksize))
+
+    def _load_remote(self, files: List[str]) -> List[TextArena]:
+        """
+        远程数据源按批预取：始终保持 prefetch 个文件在后台线程中并发下载，
+        按提交顺序取回结果并解析，以摊薄每个文件的网络往返延迟，同时限制驻留内存
+        """
+        parts: List[TextArena] = []
+        it = iter(files)
+        with ThreadPoolExecutor(max_workers=max(1, self.prefetch)) as ex:
+            pending = deque()
+            for fp in it:
+                pending.append((fp, ex.submit(read_bytes, fp)))
+                if len(pending) >= max(1, self.prefetch):
+                    break
+            while pending:
+                fp, fut = pending.popleft()
+                nxt = next(it, None)
+                if nxt is not None:
+                    pending.append((nxt, ex.submit(read_bytes, nxt)))
+                parts.append(_load_bytes(fp, fut.result(), self.is_sharegpt))
+        return parts
 
     def stats(self) -> dict:
         """
@@ -73,17 +157,27 @@ class TextDataset:
         """
         if not self._texts:
             return {'count': 0}
-        lengths = [len(t.split()) for t in self._texts]
-        lengths_sorted = sorted(lengths)
-        def pct(p):
-            i = max(0, min(len(lengths_sorted)-1, int(p * (len(lengths_sorted)-1))))
-            return lengths_sorted[i]
+        # 词长是取值范围很小的整数：先用 Counter 做 O(n) 直方图，再只对去重后的长度排序，
+        # 沿累计频数即可定位分位数，避免对全部 n 个长度做 O(n log n) 排序
+        counts = Counter(self._word_lengths())
+        n = len(self._texts)
+        ranks = {p: int(p * (n - 1)) for p in (0.5, 0.9)}
+        found = {}
+        seen = 0
+        keys = sorted(counts)
+        for L in keys:
+            seen += counts[L]
+            for p, r in ranks.items():
+                if p not in found and r < seen:
+                    found[p] = L
+            if len(found) == len(ranks):
+                break
         return {
-            'count': len(self._texts),
-            'min_words': lengths_sorted[0],
-            'max_words': lengths_sorted[-1],
-            'p50_words': pct(0.5),
-            'p90_words': pct(0.9),
+            'count': n,
+            'min_words': keys[0],
+            'max_words': keys[-1],
+            'p50_words': found[0.5],
+            'p90_words': found[0.9],
         }
 
     def filter(self, cfg: FilterConfig) -> None:
@@ -93,20 +187,31 @@ class TextDataset:
         - 长度范围过滤（词/字符/token单位）
         - 自定义谓词过滤
         """
-        idxs = list(range(len(self._texts)))
-        if cfg.min_len is not None or cfg.max_len is not None:
-            idxs = by_length(self._texts, cfg.min_len, cfg.max_len, cfg.unit, self.tokenizer)
-        if cfg.predicate is not None:
-            pidx = by_predicate([self._texts[i] for i in idxs], cfg.predicate)
-            idxs = [idxs[i] for i in pidx]
-        self._texts = [self._texts[i] for i in idxs]
+        texts = self._texts
+        has_len = cfg.min_len is not None or cfg.max_len is not None
+        if not has_len and cfg.predicate is None:
+            return
+        if has_len:
+            if cfg.unit == 'words':
+                idxs = in_range(self._word_lengths(), cfg.min_len, cfg.max_len)
+            elif cfg.unit == 'chars':
+                # 字符数在构建存储时已记录，无需解码文本
+                idxs = in_range(self._texts.char_lengths(), cfg.min_len, cfg.max_len)
+            else:
+                idxs = by_length(texts, cfg.min_len, cfg.max_len, cfg.unit, self.tokenizer)
+            if cfg.predicate is not None:
+                # 直接在长度过滤结果上判定谓词，不再物化中间文本列表
+                pred = cfg.predicate
+                idxs = [i for i in idxs if pred(texts[i])]
+        else:
+            idxs = by_predicate(texts, cfg.predicate)
+        self._reorder(idxs)
 
     def shuffle(self, seed: Optional[int] = None) -> None:
         """
         打乱文本列表顺序，支持指定新种子覆盖初始化种子
         """
-        rnd = random.Random(self.seed if seed is None else seed)
-        rnd.shuffle(self._texts)
+        self._reorder(permutation(len(self._texts), self.seed if seed is None else seed))
 
     def select(self, cfg: SampleConfig) -> List[str]:
         """
@@ -148,17 +253,19 @@ class TextDataset:
         - drop_last: 是否丢弃最后一个不足批次大小的批次
         返回：迭代器，每次返回一个文本列表（批次）
         """
+        texts = self._texts
+        N = len(texts)
         if mode == 'sequential':
-            for i in range(0, len(self._texts), batch_size):
-                batch = self._texts[i:i + batch_size]
-                if batch or not drop_last:
+            for i in range(0, N, batch_size):
+                batch = texts[i:i + batch_size]
+                if len(batch) == batch_size or not drop_last:
                     yield batch
         elif mode == 'random':
-            sampler = RandomSampler(self._texts, seed=self.seed)
-            items = sampler.sample(len(self._texts))
-            for i in range(0, len(items), batch_size):
-                batch = items[i:i + batch_size]
-                if batch or not drop_last:
+            # 只打乱下标数组，逐批按下标取文本，不预先物化整份打乱后的文本列表
+            perm = permutation(N, self.seed)
+            for i in range(0, N, batch_size):
+                batch = [texts[j] for j in perm[i:i + batch_size]]
+                if len(batch) == batch_size or not drop_last:
                     yield batch
         else:
-            raise ValueError(f'Unknown batch mode: {mode}')
\ No newline at end of file
+            raise ValueError(f'Unknown batch mode: {mode}')
@@ -1,44 +1,109 @@
 import logging
-from typing import Any, Optional
+from typing import Any, Callable, Optional
 
 
-def extract(item: Any, is_sharegpt: bool = False) -> Optional[str]:
-    """
-    从输入对象中抽取文本。
-    - 支持字符串、字典（普通 JSON 与 ShareGPT 格式）。
-    - 返回规范化（去首尾空白、压缩多空格）的文本或 None。
-    """
-    if isinstance(item, str):
-        t = item.strip()
+def _squash(v: str) -> str:
+    """压缩空白（去首尾空白、连续空白合并为单个空格），等价于 ' '.join(v.split())"""
+    # isprintable() 为 True 时，字符串中除 ASCII 空格外不含任何空白字符；
+    # 再排除连续空格，即可只做 strip，省去 split/join 的临时列表
+    if v.isprintable() and '  ' not in v:
+        return v.strip()
+    return ' '.join(v.split())
+
+
+# 本模块保持纯 Python，但所有局部变量均带注解：可选地用 `cythonize -i extractors.py` 原地编译为扩展模块，
+# Cython 据此把 str/list 局部变量编译为具体类型；值来源不确定的变量注解为 Any（即 object）
+
+
+def _extract_str(item: str) -> Optional[str]:
+    t: str = item.strip()
+    return t if t else None
+
+
+def _extract_dict_plain(item: dict) -> Optional[str]:
+    t: str
+    v_text: Any = item.get('text')
+    if isinstance(v_text, str):
+        t = v_text.strip()
         return t if t else None
 
-    if isinstance(item, dict):
-        if is_sharegpt:
-            conv = item.get('conversation')
-            if isinstance(conv, list) and conv:
-                texts = []
-                for m in conv:
-                    if isinstance(m, dict):
-                        v = m.get('human')
-                        if isinstance(v, str):
-                            texts.append(' '.join(v.split()))
-                if texts:
-                    return ' '.join(texts)
-
-            convs = item.get('conversations')
-            if isinstance(convs, list) and convs:
-                v = convs[0].get('value')
-                if isinstance(v, str):
-                    return ' '.join(v.split())
+    v_human: Any = item.get('human')
+    if isinstance(v_human, str):
+        t = _squash(v_human)
+        return t if t else None
 
-        v_text = item.get('text')
-        if isinstance(v_text, str):
-            t = v_text.strip()
+    return None
+
+
+def _extract_dict_sharegpt(item: dict) -> Optional[str]:
+    t: str
+    v: Any
+    m: Any
+    conv: Any = item.get('conversation')
+    if isinstance(conv, list) and conv:
+        # 先拼接各轮原始 human 文本，再整体压缩一次空白：结果与逐轮压缩后以空格拼接完全一致
+        # （空轮次在 split 时自然消失），但省去每轮一次的临时列表与字符串分配
+        texts: list = []
+        for m in conv:
+            if isinstance(m, dict):
+                v = m.get('human')
+                if isinstance(v, str):
+                    texts.append(v)
+        if texts:
+            # 存在 human 轮次但全为空白时返回 None（丢弃该条），不回落到 conversations/text/human 字段
+            t = _squash(' '.join(texts))
             return t if t else None
 
-        v_human = item.get('human')
-        if isinstance(v_human, str):
-            t = ' '.join(v_human.split())
+    convs: Any = item.get('conversations')
+    if isinstance(convs, list) and convs and isinstance(convs[0], dict):
+        v = convs[0].get('value')
+        if isinstance(v, str):
+            t = _squash(v)
             return t if t else None
 
-    return None
\ No newline at end of file
+    return _extract_dict_plain(item)
+
+
+def _extract_plain(item: Any) -> Optional[str]:
+    # JSON 解析器返回的都是精确的 dict/str，先做类型同一性判断；子类转换为精确类型后再分派
+    # （编译后参数注解按精确类型检查，会拒绝子类）
+    cls: type = type(item)
+    if cls is dict:
+        return _extract_dict_plain(item)
+    if cls is str:
+        return _extract_str(item)
+    if isinstance(item, dict):
+        return _extract_dict_plain(dict(item))
+    if isinstance(item, str):
+        return _extract_str(str(item))
+    return None
+
+
+def _extract_sharegpt(item: Any) -> Optional[str]:
+    cls: type = type(item)
+    if cls is dict:
+        return _extract_dict_sharegpt(item)
+    if cls is str:
+        return _extract_str(item)
+    if isinstance(item, dict):
+        return _extract_dict_sharegpt(dict(item))
+    if isinstance(item, str):
+        return _extract_str(str(item))
+    return None
+
+
+def get_extractor(is_sharegpt: bool = False) -> Callable[[Any], Optional[str]]:
+    """
+    返回按格式特化的抽取函数，供热循环在循环外一次性选定，
+    避免每条数据都重复判断 is_sharegpt。
+    """
+    return _extract_sharegpt if is_sharegpt else _extract_plain
+
+
+def extract(item: Any, is_sharegpt: bool = False) -> Optional[str]:
+    """
+    从输入对象中抽取文本。
+    - 支持字符串、字典（普通 JSON 与 ShareGPT 格式）。
+    - 返回规范化（去首尾空白、压缩多空格）的非空文本或 None，调用方无需再做去空。
+    """
+    return get_extractor(is_sharegpt)(item)
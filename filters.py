@@ -1,4 +1,5 @@
-from typing import Callable, Iterable, List, Optional, Tuple
+from array import array
+from typing import Callable, Iterable, List, Optional, Sequence
 
 
 def length_words(text: str) -> int:
@@ -13,6 +14,58 @@ def length_tokens(text: str, tokenizer) -> int:
     return len(tokenizer(text).input_ids)
 
 
+_TOKENIZE_BATCH = 1024  # 批量编码时每批文本数，兼顾 FFI 调用次数与峰值内存
+
+
+def length_tokens_batch(texts: Sequence[str], tokenizer) -> array:
+    """
+    分批调用 tokenizer 计算 token 长度：fast tokenizer 在一次调用内并行编码整批文本，
+    替代逐条调用 length_tokens 的 Python→Rust 往返。计数口径与 length_tokens 一致（含特殊 token）。
+    不支持批量输入或 return_length 参数、或返回值不是映射的 tokenizer（抛出 TypeError），
+    自动回退为逐条调用 length_tokens，只要求 tokenizer(text).input_ids 可用。
+    """
+    out = array('l')
+    for i in range(0, len(texts), _TOKENIZE_BATCH):
+        batch = texts[i:i + _TOKENIZE_BATCH]
+        try:
+            enc = tokenizer(list(batch), return_length=True)
+            lengths = enc['length'] if 'length' in enc else list(map(len, enc['input_ids']))
+        except TypeError:
+            out.extend([length_tokens(t, tokenizer) for t in texts[i:]])
+            break
+        out.extend(lengths)
+    return out
+
+
+def lengths_of(texts: Iterable[str], unit: str = 'words', tokenizer=None) -> array:
+    """
+    一次性计算全部文本的长度，返回紧凑的整型数组（array('l')），
+    供长度过滤与统计复用，避免在过滤循环中逐条分派长度函数。
+    """
+    if unit == 'words':
+        return array('l', [len(t.split()) for t in texts])
+    if unit == 'chars':
+        return array('l', map(len, texts))
+    if unit == 'tokens':
+        if tokenizer is None:
+            raise ValueError('tokenizer is required for unit=tokens')
+        if not isinstance(texts, Sequence):
+            texts = list(texts)
+        return length_tokens_batch(texts, tokenizer)
+    raise ValueError(f'Unknown unit: {unit}')
+
+
+def in_range(lengths: Sequence[int], min_len: Optional[int], max_len: Optional[int]) -> List[int]:
+    """返回长度落在 [min_len, max_len] 内的下标（None 表示不限）"""
+    if min_len is None and max_len is None:
+        return list(range(len(lengths)))
+    if max_len is None:
+        return [i for i, L in enumerate(lengths) if L >= min_len]
+    if min_len is None:
+        return [i for i, L in enumerate(lengths) if L <= max_len]
+    return [i for i, L in enumerate(lengths) if min_len <= L <= max_len]
+
+
 def by_length(
     texts: Iterable[str],
     min_len: Optional[int],
@@ -20,22 +73,8 @@ def by_length(
     unit: str = 'words',
     tokenizer=None,
 ) -> List[int]:
-    idxs: List[int] = []
-    for i, t in enumerate(texts):
-        if unit == 'words':
-            L = length_words(t)
-        elif unit == 'chars':
-            L = length_chars(t)
-        elif unit == 'tokens':
-            if tokenizer is None:
-                raise ValueError('tokenizer is required for unit=tokens')
-            L = length_tokens(t, tokenizer)
-        else:
-            raise ValueError(f'Unknown unit: {unit}')
-        if (min_len is None or L >= min_len) and (max_len is None or L <= max_len):
-            idxs.append(i)
-    return idxs
+    return in_range(lengths_of(texts, unit, tokenizer), min_len, max_len)
 
 
 def by_predicate(texts: Iterable[str], pred: Callable[[str], bool]) -> List[int]:
-    return [i for i, t in enumerate(texts) if pred(t)]
\ No newline at end of file
+    return [i for i, t in enumerate(texts) if pred(t)]
@@ -1,24 +1,151 @@
-import os
 import json
-from glob import glob
-from typing import Iterator, Any, List
+import mmap
+import os
+from typing import Iterable, Iterator, Any, List
+
+try:
+    import orjson as _json
+    _LOADS_BUFFER = True  # orjson.loads 可直接接受 memoryview，用于零拷贝解析 mmap
+except ImportError:
+    _LOADS_BUFFER = False
+    try:
+        import ujson as _json
+    except ImportError:
+        import json as _json
+
+try:
+    import simdjson as _simdjson
+except ImportError:
+    _simdjson = None
+
+try:
+    import fsspec
+except ImportError:
+    fsspec = None
+
+
+def _loads(data: Any) -> Any:
+    """
+    优先使用快速解析器；orjson/ujson 比 stdlib json 更严格（拒绝 NaN/Infinity、超出 64 位的整数等），
+    解析失败时回退到 json.loads，保证 stdlib 可解析的输入结果不变
+    """
+    try:
+        return _json.loads(data)
+    except Exception:
+        if _json is json:
+            raise
+        return json.loads(bytes(data) if isinstance(data, memoryview) else data)
+
+
+_CHUNK_SIZE = 1 << 20  # 按 1MB 块读取 JSONL
+
+
+def _iter_lines(f) -> Iterator[bytes]:
+    """
+    按块读取二进制文件并以 b'\n' 切分行。
+    跨块的残行先暂存在列表中，遇到换行时一次性 join，避免反复拼接 bytes。
+    """
+    pending: List[bytes] = []
+    while True:
+        chunk = f.read(_CHUNK_SIZE)
+        if not chunk:
+            break
+        start = 0
+        nl = chunk.find(b'\n')
+        if nl == -1:
+            pending.append(chunk)
+            continue
+        if pending:
+            pending.append(chunk[:nl])
+            yield b''.join(pending)
+            pending = []
+        else:
+            yield chunk[:nl]
+        start = nl + 1
+        while True:
+            nl = chunk.find(b'\n', start)
+            if nl == -1:
+                break
+            yield chunk[start:nl]
+            start = nl + 1
+        if start < len(chunk):
+            pending.append(chunk[start:])
+    if pending:
+        yield b''.join(pending)
+
+
+def _parse_lines(lines: Iterable[bytes]) -> Iterator[Any]:
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield _loads(line)
+        except Exception:
+            yield line.decode('utf-8')
 
 
 def iter_jsonl(path: str) -> Iterator[Any]:
-    with open(path, 'r', encoding='utf-8') as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            try:
-                yield json.loads(line)
-            except Exception:
-                yield line
+    # 以二进制读取：orjson/ujson/json 的 loads 均可直接接受 bytes，省去一次 UTF-8 解码
+    with open(path, 'rb', buffering=0) as f:
+        yield from _parse_lines(_iter_lines(f))
+
+
+def iter_jsonl_bytes(data: bytes) -> Iterator[Any]:
+    """解析已读入内存的 JSONL 内容（用于远程数据源）"""
+    return _parse_lines(data.split(b'\n'))
+
+
+def _load_json(path: str) -> Any:
+    with open(path, 'rb') as f:
+        if _LOADS_BUFFER and os.fstat(f.fileno()).st_size:
+            # 内存映射文件交给 orjson 解析，省去把整个文件读入 bytes 的一次拷贝
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                with memoryview(mm) as mv:
+                    return _loads(mv)
+        # orjson 没有 load()，统一读入 bytes 后调用 loads
+        return _loads(f.read())
+
+
+def _materialize(v: Any) -> Any:
+    """将 simdjson 的惰性视图转换为普通 dict/list，供 extract 使用"""
+    if isinstance(v, _simdjson.Object):
+        return v.as_dict()
+    if isinstance(v, _simdjson.Array):
+        return v.as_list()
+    return v
+
+
+def _iter_json_simd(path: str) -> Iterator[Any]:
+    # simdjson 在原生层读取并解析文件，顶层数组的元素逐条物化，不一次性构造整个 Python 对象树；
+    # 文档依附于 parser，迭代期间须保持 parser 存活
+    parser = _simdjson.Parser()
+    try:
+        doc = parser.load(path)
+    except ValueError:
+        # simdjson 同样拒绝 NaN/Infinity 等 stdlib json 可接受的输入，回退到常规解析
+        yield from _iter_items(_load_json(path))
+        return
+    if isinstance(doc, _simdjson.Array):
+        for it in doc:
+            yield _materialize(it)
+    else:
+        yield _materialize(doc)
 
 
 def iter_json(path: str) -> Iterator[Any]:
-    with open(path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    if _simdjson is not None:
+        yield from _iter_json_simd(path)
+        return
+    yield from _iter_items(_load_json(path))
+
+
+def iter_json_bytes(data: bytes) -> Iterator[Any]:
+    """解析已读入内存的 JSON 内容（用于远程数据源）"""
+    return _iter_items(_loads(data))
+
+
+def _iter_items(data: Any) -> Iterator[Any]:
     if isinstance(data, list):
         for it in data:
             yield it
@@ -26,12 +153,48 @@ def iter_json(path: str) -> Iterator[Any]:
         yield data
 
 
+def is_remote(source: str) -> bool:
+    """是否为 fsspec 风格的 URL（如 s3://、gs://），这类数据源经 fsspec 读取"""
+    return '://' in source
+
+
+def _require_fsspec() -> None:
+    if fsspec is None:
+        raise ImportError('fsspec is required for remote sources (pip install fsspec)')
+
+
+def read_bytes(url: str) -> bytes:
+    """读取远程文件的全部内容"""
+    _require_fsspec()
+    with fsspec.open(url, 'rb') as f:
+        return f.read()
+
+
+def _iter_remote_sources(source: str) -> Iterator[str]:
+    _require_fsspec()
+    fs, root = fsspec.core.url_to_fs(source)
+    if not fs.isdir(root):
+        yield source
+        return
+    for p in sorted(fs.ls(root, detail=False)):
+        name = p.rsplit('/', 1)[-1]
+        if name.startswith('.'):
+            continue
+        if name.endswith('.jsonl') or name.endswith('.json'):
+            yield fs.unstrip_protocol(p)
+
+
 def iter_sources(source: str) -> Iterator[str]:
-    if os.path.isdir(source):
-        files: List[str] = []
-        files.extend(glob(os.path.join(source, '*.jsonl')))
-        files.extend(glob(os.path.join(source, '*.json')))
-        for fp in files:
-            yield fp
+    if is_remote(source):
+        yield from _iter_remote_sources(source)
+    elif os.path.isdir(source):
+        # 单次 scandir 遍历目录并按后缀筛选，替代两次 glob（与 glob 一致，跳过隐藏文件）
+        with os.scandir(source) as it:
+            for e in it:
+                name = e.name
+                if name.startswith('.'):
+                    continue
+                if (name.endswith('.jsonl') or name.endswith('.json')) and e.is_file():
+                    yield e.path
     else:
-        yield source
\ No newline at end of file
+        yield source
@@ -1,7 +1,19 @@
 import random
+from array import array
+from itertools import islice
 from typing import List, Optional, Iterator
 
 
+def permutation(n: int, seed: Optional[int] = None) -> array:
+    """
+    返回 0..n-1 的随机排列（int64 下标数组），供打乱与随机批处理按下标重排文本。
+    与 RandomSampler 一致使用 random.Random，同一种子在任何环境下都得到相同排列。
+    """
+    perm = array('q', range(n))
+    random.Random(seed).shuffle(perm)
+    return perm
+
+
 class RandomSampler:
     def __init__(self, items: List[str], seed: Optional[int] = None, replace: bool = False):
         self.items = items
@@ -9,17 +21,16 @@ class RandomSampler:
         self.rng = random.Random(seed)
 
     def sample(self, n: Optional[int] = None) -> List[str]:
-        if n is None or n >= len(self.items):
-            if self.replace:
-                return [self.rng.choice(self.items) for _ in range(n or len(self.items))]
-            items = self.items[:]
-            self.rng.shuffle(items)
-            return items
+        items = self.items
+        N = len(items)
         if self.replace:
-            return [self.rng.choice(self.items) for _ in range(n)]
-        idxs = list(range(len(self.items)))
-        self.rng.shuffle(idxs)
-        return [self.items[i] for i in idxs[:n]]
+            # choices 在 C 层循环取样，替代逐条调用 choice
+            return self.rng.choices(items, k=N if n is None else n)
+        if n is None or n >= N:
+            # sample 整体取样即返回打乱后的新列表，省去单独的复制 + shuffle
+            return self.rng.sample(items, N)
+        # 只抽取 n 个下标（O(n)），不再复制并打乱全部 N 个元素
+        return [items[i] for i in self.rng.sample(range(N), n)]
 
 
 class SequentialSampler:
@@ -35,13 +46,13 @@ class SequentialSampler:
         return s
 
     def iterate(self, cycle: bool = False) -> Iterator[str]:
-        while True:
-            for i in range(self.ptr, len(self.items)):
-                yield self.items[i]
-            if cycle:
-                self.ptr = 0
-            else:
-                break
+        items = self.items
+        yield from islice(items, self.ptr, None)
+        if cycle:
+            # 首轮从 ptr 开始，之后每轮从头完整遍历；空列表直接结束，避免空转
+            self.ptr = 0
+            while items:
+                yield from items
 
 
 class SpecifiedSampler:
@@ -0,0 +1,201 @@
+import hashlib
+import logging
+import mmap
+import os
+import struct
+from array import array
+from collections.abc import Sequence as _SequenceABC
+from typing import Iterable, Iterator, List, Optional, Sequence, Union
+
+# 缓存文件布局：<magic:8><key:32><n:u64><offsets:int64[n+1]><chars:int64[n]><utf8 bytes>
+_CACHE_MAGIC = b'TXTARN01'
+_CACHE_HEADER = struct.Struct('<8s32sQ')
+# 抽取/解析逻辑版本：参与缓存键计算。extractors/io 的输出文本含义发生变化时（如空白规整、丢弃规则）必须递增，
+# 否则默认开启的缓存会在输入文件未变时继续返回旧逻辑的抽取结果
+_EXTRACT_VERSION = 2
+
+
+class TextArena(_SequenceABC):
+    """
+    紧凑文本存储：全部文本按 UTF-8 编码拼接为一块连续字节缓冲，另以 int64 偏移数组记录边界（SoA 布局）。
+    - 相比 List[str]，省去每条文本约 50 字节的 str 对象开销，访问时按需解码
+    - 另存每条文本的字符数，按字符长度过滤无需解码
+    - 打乱/过滤只生成新的下标数组（order），底层字节缓冲在各视图间共享
+    对外表现为只读的 Sequence[str]：支持 len()、下标/切片访问与迭代
+    """
+    __slots__ = ('_data', '_offsets', '_chars', '_order')
+
+    def __init__(self, data: bytes, offsets: array, chars: array, order: Optional[array] = None):
+        self._data = data  # 拼接后的 UTF-8 字节缓冲（bytearray/bytes，或缓存文件 mmap 上的 memoryview）
+        self._offsets = offsets  # 第 i 条文本位于 data[offsets[i]:offsets[i+1]]
+        self._chars = chars  # 第 i 条文本的字符数
+        self._order = order  # 视图顺序（指向底层文本的下标），None 表示按存储顺序
+
+    @classmethod
+    def from_texts(cls, texts: Iterable[str]) -> 'TextArena':
+        """
+        逐条编码并追加到字节缓冲，同时记录偏移与字符数。
+        stdlib json 会把 "\ud83d" 这类转义解码为孤立代理字符，严格 UTF-8 无法编码，
+        因此编码/解码统一使用 surrogatepass，保证原样往返且字符数与 len(t) 一致。
+        texts 可以是生成器：构建过程中不保留中间的 str 列表或编码后的 bytes 列表
+        """
+        buf = bytearray()
+        offsets = array('q', [0])
+        chars = array('q')
+        for t in texts:
+            buf += t.encode('utf-8', 'surrogatepass')
+            offsets.append(len(buf))
+            chars.append(len(t))
+        return cls(buf, offsets, chars)
+
+    @classmethod
+    def concat(cls, parts: Sequence['TextArena']) -> 'TextArena':
+        """按顺序拼接多个存储（用于合并各文件的解析结果）"""
+        if len(parts) == 1:
+            return parts[0].compact()
+        buf = bytearray()
+        offsets = array('q', [0])
+        chars = array('q')
+        for p in parts:
+            p = p.compact()
+            base = offsets[-1]
+            offsets.extend([o + base for o in p._offsets[1:]])
+            chars.extend(p._chars)
+            buf += p._data
+        return cls(buf, offsets, chars)
+
+    def __reduce__(self):
+        # 缓存命中时各字段是 mmap 上的 memoryview，无法直接 pickle/deepcopy：先拷贝为 bytes/array
+        data, offsets, chars = self._data, self._offsets, self._chars
+        if isinstance(data, memoryview):
+            data = data.tobytes()
+        if isinstance(offsets, memoryview):
+            offsets = array('q', offsets)
+        if isinstance(chars, memoryview):
+            chars = array('q', chars)
+        return TextArena, (data, offsets, chars, self._order)
+
+    def compact(self) -> 'TextArena':
+        """按当前视图顺序重建连续存储；已是存储顺序时直接返回自身"""
+        if self._order is None:
+            return self
+        return TextArena.from_texts(self)
+
+    def take(self, idxs: Iterable[int]) -> 'TextArena':
+        """按视图下标重排或截取，返回共享底层缓冲的新视图"""
+        order = self._order
+        if order is None:
+            new_order = array('q', idxs)
+        else:
+            new_order = array('q', [order[i] for i in idxs])
+        return TextArena(self._data, self._offsets, self._chars, new_order)
+
+    def char_lengths(self) -> array:
+        """按视图顺序返回各文本的字符数"""
+        chars = self._chars
+        if self._order is None:
+            return array('q', chars)
+        return array('q', [chars[j] for j in self._order])
+
+    def _decode(self, j: int) -> str:
+        offsets = self._offsets
+        return str(self._data[offsets[j]:offsets[j + 1]], 'utf-8', 'surrogatepass')
+
+    def __len__(self) -> int:
+        return len(self._chars) if self._order is None else len(self._order)
+
+    def __getitem__(self, i: Union[int, slice]) -> Union[str, List[str]]:
+        if isinstance(i, slice):
+            return [self._decode(j) for j in self._positions(i)]
+        if self._order is not None:
+            return self._decode(self._order[i])
+        n = len(self._chars)
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError('TextArena index out of range')
+        return self._decode(i)
+
+    def _positions(self, s: slice) -> Iterable[int]:
+        r = range(*s.indices(len(self)))
+        return r if self._order is None else [self._order[k] for k in r]
+
+    def __iter__(self) -> Iterator[str]:
+        data = self._data
+        offsets = self._offsets
+        order = range(len(self._chars)) if self._order is None else self._order
+        for j in order:
+            yield str(data[offsets[j]:offsets[j + 1]], 'utf-8', 'surrogatepass')
+
+
+def cache_path(source: str, is_sharegpt: bool) -> str:
+    """缓存文件路径：<source>.<plain|sharegpt>.cache，两种解析格式各占一个文件，交替使用时互不覆盖"""
+    fmt = 'sharegpt' if is_sharegpt else 'plain'
+    return f"{source.rstrip('/' + os.sep)}.{fmt}.cache"
+
+
+def cache_key(files: Sequence[str], is_sharegpt: bool) -> bytes:
+    """由抽取逻辑版本、解析格式及各输入文件的路径、修改时间与大小计算缓存键（SHA256），任一项变动即失效"""
+    h = hashlib.sha256()
+    h.update(_CACHE_MAGIC)
+    h.update(f'extract-v{_EXTRACT_VERSION}\0'.encode('ascii'))
+    h.update(b'sharegpt' if is_sharegpt else b'plain')
+    for fp in files:
+        st = os.stat(fp)
+        h.update(f'{fp}\0{st.st_mtime_ns}\0{st.st_size}\0'.encode('utf-8', 'surrogatepass'))
+    return h.digest()
+
+
+def save_arena(arena: TextArena, path: str, key: bytes) -> None:
+    """
+    将存储按缓存布局写入 path（不经 pickle）；先写临时文件再原子替换。
+    写入失败（如目录只读）只记录警告，不影响正常使用
+    """
+    arena = arena.compact()
+    offsets = array('q', arena._offsets)
+    chars = array('q', arena._chars)
+    tmp = f'{path}.tmp{os.getpid()}'
+    try:
+        with open(tmp, 'wb') as f:
+            f.write(_CACHE_HEADER.pack(_CACHE_MAGIC, key, len(chars)))
+            f.write(offsets.tobytes())
+            f.write(chars.tobytes())
+            f.write(arena._data)
+        os.replace(tmp, path)
+    except OSError as e:
+        logging.warning(f'Failed to write text cache {path}: {e}')
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+
+
+def load_arena(path: str, key: bytes) -> Optional[TextArena]:
+    """
+    以 mmap 方式打开缓存文件，偏移与字符数组直接映射为 memoryview，不做任何 JSON 解析与拷贝。
+    文件不存在、格式不符或缓存键不一致时返回 None
+    """
+    try:
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < _CACHE_HEADER.size:
+                return None
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except OSError:
+        return None
+    magic, stored_key, n = _CACHE_HEADER.unpack_from(mm, 0)
+    start = _CACHE_HEADER.size
+    data_start = start + 8 * (2 * n + 1)
+    if magic != _CACHE_MAGIC or stored_key != key or data_start > size:
+        mm.close()
+        return None
+    view = memoryview(mm)
+    offsets = view[start:start + 8 * (n + 1)].cast('q')
+    chars = view[start + 8 * (n + 1):data_start].cast('q')
+    data = view[data_start:]
+    if offsets[n] != len(data):
+        for v in (offsets, chars, data, view):
+            v.release()
+        mm.close()
+        return None
+    return TextArena(data, offsets, chars)